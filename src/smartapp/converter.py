@@ -6,28 +6,52 @@
 Converter to serialize and deserialize lifecycle objects to various formats.
 """
 import json
-from typing import Any, Dict, Type, TypeVar
+from datetime import datetime as NativeDateTime
+from datetime import timedelta
+from enum import Enum
+from sys import intern
+from typing import Any, Callable, Dict, List, Mapping, Tuple, Type, TypeVar, Union
+from weakref import WeakKeyDictionary
 
 import yaml
 from attrs import fields, has
 from cattrs import GenConverter
 from cattrs.gen import make_dict_structure_fn, make_dict_unstructure_fn, override
-from pendulum import from_format, now
+from pendulum import from_format, instance, now
 from pendulum.datetime import DateTime
 
 from .interface import (
-    CONFIG_SETTING_BY_TYPE,
-    CONFIG_VALUE_BY_TYPE,
-    REQUEST_BY_PHASE,
+    CONFIG_SETTING_TAG,
+    CONFIG_VALUE_TAG,
+    REQUEST_TAG,
+    BooleanValue,
+    ConfigPhase,
     ConfigSetting,
     ConfigSettingType,
     ConfigValue,
     ConfigValueType,
+    EventType,
     LifecyclePhase,
     LifecycleRequest,
+    SubscriptionType,
 )
 
+# The libyaml-based C implementations are much faster, but they're not available on every platform
+try:
+    from yaml import CSafeDumper as YamlDumper
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeDumper as YamlDumper  # type: ignore[assignment]
+    from yaml import SafeLoader as YamlLoader  # type: ignore[assignment]
+
+# orjson is an optional dependency; it's much faster than the standard library, but we don't require it
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
 DATETIME_ZONE = "UTC"
+UTC_OFFSET = timedelta(0)
 
 DATETIME_SEC_EPOCH = "1970-01-01T00:00:00Z"  # date of the UNIX epoch, which sometimes seem to mean "no date"
 DATETIME_SEC_LEN = len("YYYY-MM-DDTHH:MM:SSZ")  # like "2017-09-13T04:18:12Z"
@@ -37,12 +61,53 @@ DATETIME_MS_EPOCH = "1970-01-01T00:00:00.000Z"  # date of the UNIX epoch, which
 DATETIME_MS_LEN = len("YYYY-MM-DDTHH:MM:SS.SSSZ")  # like "2017-09-13T04:18:12.992Z"
 DATETIME_MS_FORMAT = "YYYY-MM-DD[T]HH:mm:ss.SSS[Z]"
 
+DATETIME_EPOCHS = frozenset([DATETIME_SEC_EPOCH, DATETIME_MS_EPOCH])
+DATETIME_SEPARATORS = {  # the characters at positions 4, 7, 10, 13, 16 and 19, i.e. datetime[4:20:3]
+    DATETIME_SEC_LEN: "--T::Z",
+    DATETIME_MS_LEN: "--T::.",
+}
+
 T = TypeVar("T")  # pylint: disable=invalid-name:
 
 
+def dumps_json(data: Any) -> str:
+    """
+    Dump unstructured data to a JSON string, using orjson if it is available.
+
+    The orjson output is equivalent JSON but not byte-for-byte identical to the standard library:
+    non-ASCII characters are written as UTF-8 rather than escaped, and NaN or infinite floats are
+    written as null.  Data that orjson can't serialize (like integers wider than 64 bits) falls back
+    to the standard library.
+    """
+    if orjson:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:  # orjson.JSONEncodeError is a subclass of TypeError
+            pass
+    return json.dumps(data, indent="  ")
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    Load unstructured data from a JSON string or UTF-8 bytes, using orjson if it is available.
+
+    Input that orjson rejects (like NaN or lone surrogates) is retried with the standard library,
+    which decides whether it is valid.  Note that orjson loads integers wider than 64 bits as floats.
+    """
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
 def serialize_datetime(datetime: DateTime) -> str:
     """Serialize a DateTime to a string."""
     # Note that we always use the full millisecond timestamp here and always convert to UTC
+    # Nearly everything we serialize is already in UTC, and isoformat() is much faster than format()
+    if datetime.utcoffset() == UTC_OFFSET:
+        return NativeDateTime.isoformat(datetime, timespec="milliseconds")[: -len("+00:00")] + "Z"
     return datetime.in_timezone(DATETIME_ZONE).format(DATETIME_MS_FORMAT)  # type: ignore[no-untyped-call,no-any-return,unused-ignore]
 
 
@@ -53,11 +118,24 @@ def deserialize_datetime(datetime: str) -> DateTime:
     # milliseconds.  Further, some requests come with a UNIX epoch date (1970-01-01) which
     # I guess is probably what happens when no date was set by the device.  I'm choosing
     # to interpret that as "now".
-    if datetime in (DATETIME_MS_EPOCH, DATETIME_SEC_EPOCH):
+    #
+    # Both of the formats we accept are ISO 8601 in UTC, so we try the standard library
+    # parser first.  It's implemented in C and is much faster than parsing via a format
+    # string, which matters since every event carries at least one of these.  We fall back
+    # to the format-based parsing for anything the fast path doesn't handle.  The standard
+    # library parser accepts many more ISO 8601 forms than we do (offsets, week dates, comma
+    # fractions), so we only hand it strings with separators exactly where we expect them.
+    if datetime in DATETIME_EPOCHS:
         return now()
-    elif len(datetime) == DATETIME_MS_LEN:
+    length = len(datetime)
+    if DATETIME_SEPARATORS.get(length) == datetime[4:20:3] and datetime[-1] == "Z":
+        try:
+            return instance(NativeDateTime.fromisoformat(datetime[:-1]), tz=DATETIME_ZONE)
+        except ValueError:
+            pass
+    if length == DATETIME_MS_LEN:
         return from_format(datetime, DATETIME_MS_FORMAT, tz=DATETIME_ZONE)
-    elif len(datetime) == DATETIME_SEC_LEN:
+    elif length == DATETIME_SEC_LEN:
         return from_format(datetime, DATETIME_SEC_FORMAT, tz=DATETIME_ZONE)
     else:
         raise ValueError("Unknown datetime format: %s" % datetime)
@@ -74,40 +152,50 @@ class StandardConverter(GenConverter):
 
     # The factory hooks convert snake case to camel case
     # See: https://cattrs.readthedocs.io/en/latest/usage.html#using-factory-hooks
+    # cattrs caches the hook generated for each class, so the factories only run once per class
 
     def __init__(self) -> None:
         super().__init__()
+        self._camel_case_names: WeakKeyDictionary[Type[Any], Dict[str, str]] = WeakKeyDictionary()
         self.register_unstructure_hook_factory(has, self._unstructure_camel_case)
         self.register_structure_hook_factory(has, self._structure_camel_case)
 
     def to_json(self, obj: Any) -> str:
         """Serialize an object to JSON."""
-        return json.dumps(self.unstructure(obj), indent="  ")
+        return dumps_json(self.unstructure(obj))
 
-    def from_json(self, data: str, cls: Type[T]) -> T:
-        """Deserialize an object from JSON."""
-        return self.structure(json.loads(data), cls)
+    def from_json(self, data: Union[str, bytes], cls: Type[T]) -> T:
+        """Deserialize an object from JSON, passed either as a string or as raw UTF-8 bytes."""
+        return self.structure(loads_json(data), cls)
 
     def to_yaml(self, obj: Any) -> str:
         """Serialize an object to YAML."""
-        return yaml.safe_dump(self.unstructure(obj), sort_keys=False)
+        return yaml.dump(self.unstructure(obj), Dumper=YamlDumper, sort_keys=False)
 
     def from_yaml(self, data: str, cls: Type[T]) -> T:
         """Deserialize an object from YAML."""
-        return self.structure(yaml.safe_load(data), cls)
+        return self.structure(yaml.load(data, Loader=YamlLoader), cls)
 
     def _to_camel_case(self, name: str) -> str:
         """Convert a snake_case attribute name to camelCase instead."""
         components = name.split("_")
         return components[0] + "".join(x.title() for x in components[1:])
 
+    def _camel_case_map(self, cls: Type[Any]) -> Dict[str, str]:
+        """Return a mapping from snake_case to camelCase for all attributes of a class, computed once per class."""
+        names = self._camel_case_names.get(cls)
+        if names is None:
+            names = {a.name: self._to_camel_case(a.name) for a in fields(cls)}
+            self._camel_case_names[cls] = names
+        return names
+
     def _unstructure_camel_case(self, cls):  # type: ignore
         """Automatic snake_case to camelCase conversion when serializing any class."""
-        return make_dict_unstructure_fn(cls, self, **{a.name: override(rename=self._to_camel_case(a.name)) for a in fields(cls)})  # type: ignore
+        return make_dict_unstructure_fn(cls, self, **{k: override(rename=v) for k, v in self._camel_case_map(cls).items()})  # type: ignore
 
     def _structure_camel_case(self, cls):  # type: ignore
         """Automatic snake_case to camelCase conversion when deserializing any class."""
-        return make_dict_structure_fn(cls, self, **{a.name: override(rename=self._to_camel_case(a.name)) for a in fields(cls)})  # type: ignore
+        return make_dict_structure_fn(cls, self, **{k: override(rename=v) for k, v in self._camel_case_map(cls).items()})  # type: ignore
 
 
 # noinspection PyMethodMayBeStatic
@@ -118,11 +206,57 @@ class SmartAppConverter(StandardConverter):
 
     def __init__(self) -> None:
         super().__init__()
+        # Our enums are str subclasses, which cattrs would pass through as-is, and which YAML can't represent
+        # Going the other way, a lookup by value is cheaper than constructing the enum via Enum.__call__()
+        enums: List[Type[Enum]] = [
+            BooleanValue,
+            ConfigPhase,
+            ConfigSettingType,
+            ConfigValueType,
+            EventType,
+            LifecyclePhase,
+            SubscriptionType,
+        ]
+        for enum in enums:
+            self.register_unstructure_hook(enum, self._unstructure_enum)
+            self.register_structure_hook(enum, self._enum_structure_hook(enum))
         self.register_unstructure_hook(DateTime, self._unstructure_datetime)
         self.register_structure_hook(DateTime, self._structure_datetime)
         self.register_structure_hook(ConfigValue, self._structure_config_value)
         self.register_structure_hook(ConfigSetting, self._structure_config_setting)
         self.register_structure_hook(LifecycleRequest, self._structure_request)
+        self.register_structure_hook_func(lambda t: t == List[ConfigValue], self._structure_config_values)
+        self.register_structure_hook_func(lambda t: t == List[ConfigSetting], self._structure_config_settings)
+        self.register_structure_hook_func(lambda t: t == Dict[str, List[ConfigValue]], self._structure_config)
+        self.register_unstructure_hook_func(lambda t: t == List[ConfigSetting], self._unstructure_config_settings)
+        self._config_value_tag, self._config_value_hooks = self._tagged_hooks(CONFIG_VALUE_TAG)
+        self._config_setting_tag, self._config_setting_hooks = self._tagged_hooks(CONFIG_SETTING_TAG)
+        self._request_tag, self._request_hooks = self._tagged_hooks(REQUEST_TAG)
+        self._config_setting_unstructure_hooks = {cls: self.get_unstructure_hook(cls) for cls in CONFIG_SETTING_TAG[1].values()}
+
+    def _tagged_hooks(
+        self, tag: Tuple[str, Mapping[Any, Type[Any]]]
+    ) -> Tuple[str, Dict[str, Tuple[Type[Any], Callable[[Any, Any], Any]]]]:
+        """Precompute the camelCase tag name and the structure hook for each class in a tagged union."""
+        # The tables are keyed by enum, but we key by the raw string found in JSON so we don't need to construct an enum first
+        attribute, classes = tag
+        return self._to_camel_case(attribute), {key.name: (cls, self.get_structure_hook(cls)) for key, cls in classes.items()}
+
+    def _enum_structure_hook(self, enum: Type[Enum]) -> Callable[[Any, Type[Enum]], Enum]:
+        """Build a structure hook that looks up enum members by value."""
+        members = {member.value: member for member in enum}
+
+        def structure(value: Any, _: Type[Enum]) -> Enum:
+            member = members.get(value)
+            if member is None:
+                raise ValueError("%r is not a valid %s" % (value, enum.__name__))
+            return member
+
+        return structure
+
+    def _unstructure_enum(self, value: Enum) -> Any:
+        """Serialize an enum to its value."""
+        return value.value if isinstance(value, Enum) else value  # callers sometimes pass the plain string instead
 
     def _unstructure_datetime(self, datetime: DateTime) -> str:
         """Serialize a DateTime to a string."""
@@ -134,27 +268,51 @@ class SmartAppConverter(StandardConverter):
 
     def _structure_config_value(self, data: Dict[str, Any], _: Type[ConfigValue]) -> ConfigValue:
         """Deserialize input data into a ConfigValue of the proper type."""
-        try:
-            value_type = ConfigValueType[data["valueType"]]
-            return self.structure(data, CONFIG_VALUE_BY_TYPE[value_type])
-        except KeyError as e:
-            raise ValueError("Unknown config value type") from e
+        entry = self._config_value_hooks.get(data.get(self._config_value_tag, ""))
+        if entry is None:
+            raise ValueError("Unknown config value type")
+        cls, hook = entry
+        return hook(data, cls)  # type: ignore
+
+    def _structure_config_values(self, data: List[Dict[str, Any]], _: Type[List[ConfigValue]]) -> List[ConfigValue]:
+        """Deserialize a list of input data into ConfigValues of the proper type, in a single pass."""
+        structure = self._structure_config_value
+        return [structure(item, ConfigValue) for item in data]  # type: ignore
+
+    def _structure_config(
+        self, data: Dict[str, List[Dict[str, Any]]], _: Type[Dict[str, List[ConfigValue]]]
+    ) -> Dict[str, List[ConfigValue]]:
+        """Deserialize a config mapping, interning the keys since callers look values up by literal (interned) strings."""
+        structure = self._structure_config_values
+        return {intern(key): structure(values, List[ConfigValue]) for key, values in data.items()}
+
+    def _unstructure_config_settings(self, settings: List[ConfigSetting]) -> List[Dict[str, Any]]:
+        """Serialize a list of ConfigSettings, dispatching directly on the class of each setting."""
+        hooks = self._config_setting_unstructure_hooks
+        return [hooks.get(type(setting), self.unstructure)(setting) for setting in settings]
 
     def _structure_config_setting(self, data: Dict[str, Any], _: Type[ConfigSetting]) -> ConfigSetting:
         """Deserialize input data into a ConfigSetting of the proper type."""
-        try:
-            value_type = ConfigSettingType[data["type"]]
-            return self.structure(data, CONFIG_SETTING_BY_TYPE[value_type])  # type: ignore
-        except KeyError as e:
-            raise ValueError("Unknown config setting type") from e
+        entry = self._config_setting_hooks.get(data.get(self._config_setting_tag, ""))
+        if entry is None:
+            raise ValueError("Unknown config setting type")
+        cls, hook = entry
+        return hook(data, cls)  # type: ignore
+
+    def _structure_config_settings(self, data: List[Dict[str, Any]], _: Type[List[ConfigSetting]]) -> List[ConfigSetting]:
+        """Deserialize a list of input data into ConfigSettings of the proper type, in a single pass."""
+        structure = self._structure_config_setting
+        return [structure(item, ConfigSetting) for item in data]  # type: ignore
 
     def _structure_request(self, data: Dict[str, Any], _: Type[LifecycleRequest]) -> LifecycleRequest:
         """Deserialize input data into a LifecycleRequest of the proper type."""
-        try:
-            phase = LifecyclePhase[data["lifecycle"]]
-            return self.structure(data, REQUEST_BY_PHASE[phase])  # type: ignore
-        except KeyError as e:
-            raise ValueError("Unknown lifecycle phase") from e
+        # Every inbound request goes through here, so we call the hook generated for each request class directly
+        entry = self._request_hooks.get(data.get(self._request_tag, ""))
+        if entry is None:
+            raise ValueError("Unknown lifecycle phase")
+        cls, hook = entry
+        return hook(data, cls)  # type: ignore
 
 
+# This shared instance is what the rest of the SDK uses; prefer it over constructing a new converter
 CONVERTER = SmartAppConverter()
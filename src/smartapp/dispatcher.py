@@ -6,7 +6,7 @@ Manage the requests and responses that are part of the SmartApp lifecycle.
 """
 import logging
 from json import JSONDecodeError
-from typing import Optional, Union
+from typing import Any, Callable, Mapping, Optional, Type, Union
 
 from attr import field, frozen
 
@@ -42,6 +42,17 @@ from .interface import (
 )
 from .signature import SignatureVerifier
 
+RequestHandler = Callable[[Optional[str], Any], LifecycleResponse]
+
+# These responses never carry any data, so the JSON is always the same and we only need to generate it once
+STATIC_RESPONSE_JSON: Mapping[Type[Any], str] = {
+    InstallResponse: CONVERTER.to_json(InstallResponse()),
+    UpdateResponse: CONVERTER.to_json(UpdateResponse()),
+    UninstallResponse: CONVERTER.to_json(UninstallResponse()),
+    OauthCallbackResponse: CONVERTER.to_json(OauthCallbackResponse()),
+    EventResponse: CONVERTER.to_json(EventResponse()),
+}
+
 
 @frozen(kw_only=True)
 class StaticConfigManager(SmartAppConfigManager):
@@ -95,6 +106,20 @@ class SmartAppDispatcher:
     event_handler: SmartAppEventHandler
     config: SmartAppDispatcherConfig = field(factory=SmartAppDispatcherConfig)
     manager: SmartAppConfigManager = field(factory=StaticConfigManager)
+    _handlers: Mapping[Type[AbstractRequest], RequestHandler] = field(init=False, repr=False, eq=False)
+
+    @_handlers.default
+    def _default_handlers(self) -> Mapping[Type[AbstractRequest], RequestHandler]:
+        # Requests are always exactly one of these types, so we can dispatch on type(request) with a single lookup
+        return {
+            ConfirmationRequest: self._handle_confirmation,
+            ConfigurationRequest: self._handle_configuration,
+            InstallRequest: self._handle_install,
+            UpdateRequest: self._handle_update,
+            UninstallRequest: self._handle_uninstall,
+            OauthCallbackRequest: self._handle_oauth_callback,
+            EventRequest: self._handle_event,
+        }
 
     def dispatch(self, context: SmartAppRequestContext) -> str:
         """
@@ -109,20 +134,31 @@ class SmartAppDispatcher:
         Raises:
             SmartAppError: If processing fails
         """
-        try:
-            if self.config.log_json:  # put this right at the top, so we've got an opportunity to debug unexpected data
-                logging.debug("[%s] Raw JSON: \n%s", context.correlation_id, context.body)  # note: may contain secrets!
-            request: LifecycleRequest = CONVERTER.from_json(context.body, LifecycleRequest)  # type: ignore
-            logging.info("[%s] Handling %s request", context.correlation_id, request.lifecycle)
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)  # checked once, so we skip building arguments for disabled messages
+        if debug and self.config.log_json:  # put this right at the top, so we've got an opportunity to debug unexpected data
+            logging.debug("[%s] Raw JSON: \n%s", context.correlation_id, context.body)  # note: may contain secrets!
+        request = self._parse_request(context)
+        logging.info("[%s] Handling %s request", context.correlation_id, request.lifecycle)
+        if debug:
             logging.debug("[%s] Date: %s", context.correlation_id, context.date)
             logging.debug("[%s] Signature: %s", context.correlation_id, context.signature)  # note: signature not confidential
             logging.debug("[%s] Request: %s", context.correlation_id, request)  # note: secrets are not serialized in repr()
+        try:
             if self.config.check_signatures:
                 SignatureVerifier(context=context, config=self.config, definition=self.definition).verify()
             response = self._handle_request(context.correlation_id, request)
-            return CONVERTER.to_json(response)
+            return STATIC_RESPONSE_JSON.get(type(response)) or CONVERTER.to_json(response)
         except SmartAppError as e:
             raise e
+        except ValueError as e:
+            raise BadRequestError("%s" % e, context.correlation_id) from e
+        except Exception as e:  # pylint: disable=broad-except:
+            raise InternalError("%s" % e, context.correlation_id) from e
+
+    def _parse_request(self, context: SmartAppRequestContext) -> LifecycleRequest:
+        """Parse the body of a request, raising BadRequestError if it is not a valid lifecycle request."""
+        try:
+            return CONVERTER.from_json(context.body, LifecycleRequest)  # type: ignore
         except JSONDecodeError as e:
             raise BadRequestError("Invalid JSON", context.correlation_id) from e
         except ValueError as e:
@@ -132,29 +168,45 @@ class SmartAppDispatcher:
 
     def _handle_request(self, correlation_id: Optional[str], request: AbstractRequest) -> LifecycleResponse:
         """Handle a lifecycle request, returning the appropriate response."""
-        if isinstance(request, ConfirmationRequest):
-            self.event_handler.handle_confirmation(correlation_id, request)
-            return self._handle_confirmation_request(request)
-        elif isinstance(request, ConfigurationRequest):
-            self.event_handler.handle_configuration(correlation_id, request)
-            return self._handle_config_request(request)
-        elif isinstance(request, InstallRequest):
-            self.event_handler.handle_install(correlation_id, request)
-            return InstallResponse()
-        elif isinstance(request, UpdateRequest):
-            self.event_handler.handle_update(correlation_id, request)
-            return UpdateResponse()
-        elif isinstance(request, UninstallRequest):
-            self.event_handler.handle_uninstall(correlation_id, request)
-            return UninstallResponse()
-        elif isinstance(request, OauthCallbackRequest):
-            self.event_handler.handle_oauth_callback(correlation_id, request)
-            return OauthCallbackResponse()
-        elif isinstance(request, EventRequest):
-            self.event_handler.handle_event(correlation_id, request)
-            return EventResponse()
-        else:
+        handler = self._handlers.get(type(request))
+        if handler is None:
             raise ValueError("Unknown lifecycle event")
+        return handler(correlation_id, request)
+
+    def _handle_confirmation(self, correlation_id: Optional[str], request: ConfirmationRequest) -> LifecycleResponse:
+        """Invoke the event handler for a CONFIRMATION request, returning the appropriate response."""
+        self.event_handler.handle_confirmation(correlation_id, request)
+        return self._handle_confirmation_request(request)
+
+    def _handle_configuration(self, correlation_id: Optional[str], request: ConfigurationRequest) -> LifecycleResponse:
+        """Invoke the event handler for a CONFIGURATION request, returning the appropriate response."""
+        self.event_handler.handle_configuration(correlation_id, request)
+        return self._handle_config_request(request)
+
+    def _handle_install(self, correlation_id: Optional[str], request: InstallRequest) -> LifecycleResponse:
+        """Invoke the event handler for an INSTALL request, returning the appropriate response."""
+        self.event_handler.handle_install(correlation_id, request)
+        return InstallResponse()
+
+    def _handle_update(self, correlation_id: Optional[str], request: UpdateRequest) -> LifecycleResponse:
+        """Invoke the event handler for an UPDATE request, returning the appropriate response."""
+        self.event_handler.handle_update(correlation_id, request)
+        return UpdateResponse()
+
+    def _handle_uninstall(self, correlation_id: Optional[str], request: UninstallRequest) -> LifecycleResponse:
+        """Invoke the event handler for an UNINSTALL request, returning the appropriate response."""
+        self.event_handler.handle_uninstall(correlation_id, request)
+        return UninstallResponse()
+
+    def _handle_oauth_callback(self, correlation_id: Optional[str], request: OauthCallbackRequest) -> LifecycleResponse:
+        """Invoke the event handler for an OAUTH_CALLBACK request, returning the appropriate response."""
+        self.event_handler.handle_oauth_callback(correlation_id, request)
+        return OauthCallbackResponse()
+
+    def _handle_event(self, correlation_id: Optional[str], request: EventRequest) -> LifecycleResponse:
+        """Invoke the event handler for an EVENT request, returning the appropriate response."""
+        self.event_handler.handle_event(correlation_id, request)
+        return EventResponse()
 
     def _handle_confirmation_request(self, request: ConfirmationRequest) -> ConfirmationResponse:
         """Handle a CONFIRMATION lifecycle request, logging data and returning an appropriate response."""
@@ -163,8 +215,9 @@ class SmartAppDispatcher:
 
     def _handle_config_request(self, request: ConfigurationRequest) -> Union[ConfigurationInitResponse, ConfigurationPageResponse]:
         """Handle a CONFIGURATION lifecycle request, returning an appropriate response."""
-        if request.configuration_data.phase == ConfigPhase.INITIALIZE:
+        configuration_data = request.configuration_data
+        if configuration_data.phase is ConfigPhase.INITIALIZE:
             return self.manager.handle_initialize(request, self.definition)
-        else:  # if request.configuration_data.phase == ConfigPhase.PAGE:
-            page_id = int(request.configuration_data.page_id)
+        else:  # if configuration_data.phase is ConfigPhase.PAGE:
+            page_id = int(configuration_data.page_id)
             return self.manager.handle_page(request, self.definition, page_id)
@@ -26,7 +26,9 @@ Classes that are part of the SmartApp interface.
 
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any, Callable, Dict, List, Mapping, Optional, Union
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
 from attrs import field, frozen
 from pendulum.datetime import DateTime
@@ -35,8 +37,16 @@ AUTHORIZATION_HEADER = "authorization"
 CORRELATION_ID_HEADER = "x-st-correlation"
 DATE_HEADER = "date"
 
+# Most requests have no settings and responses never carry data, so they share
+# this read-only empty mapping instead of allocating dicts
+EMPTY_MAPPING: Mapping[str, Any] = MappingProxyType({})
 
-class LifecyclePhase(Enum):
+
+# The enums mix in str, so members compare and hash like their raw JSON values (EventType.DEVICE_EVENT == "DEVICE_EVENT").
+# As a result, members of different enums with the same value are also equal (ConfigPhase.PAGE == ConfigSettingType.PAGE).
+
+
+class LifecyclePhase(str, Enum):
     """Lifecycle phases."""
 
     CONFIRMATION = "CONFIRMATION"
@@ -48,21 +58,21 @@ class LifecyclePhase(Enum):
     EVENT = "EVENT"
 
 
-class ConfigValueType(Enum):
+class ConfigValueType(str, Enum):
     """Types of config values."""
 
     DEVICE = "DEVICE"
     STRING = "STRING"
 
 
-class ConfigPhase(Enum):
+class ConfigPhase(str, Enum):
     """Sub-phases within the CONFIGURATION phase."""
 
     INITIALIZE = "INITIALIZE"
     PAGE = "PAGE"
 
 
-class ConfigSettingType(Enum):
+class ConfigSettingType(str, Enum):
     """Types of config settings."""
 
     DEVICE = "DEVICE"
@@ -82,7 +92,7 @@ class ConfigSettingType(Enum):
     OAUTH = "OAUTH"
 
 
-class EventType(Enum):
+class EventType(str, Enum):
     """Supported event types."""
 
     DEVICE_COMMANDS_EVENT = "DEVICE_COMMANDS_EVENT"
@@ -98,7 +108,7 @@ class EventType(Enum):
     WEATHER_EVENT = "WEATHER_EVENT"
 
 
-class SubscriptionType(Enum):
+class SubscriptionType(str, Enum):
     """Supported subscription types."""
 
     DEVICE = "DEVICE"
@@ -118,8 +128,12 @@ class BooleanValue(str, Enum):
     FALSE = "false"
 
 
-@frozen(kw_only=True)
-class AbstractRequest(ABC):
+# Configuration values are strings, so these are the ones we interpret as a boolean true
+BOOLEAN_TRUE_VALUES = frozenset([BooleanValue.TRUE.value, "True", "TRUE"])
+
+
+@frozen(kw_only=True, weakref_slot=False)
+class AbstractRequest:
     """Abstract parent class for all types of lifecycle requests."""
 
     lifecycle: LifecyclePhase
@@ -128,17 +142,17 @@ class AbstractRequest(ABC):
     version: str
 
 
-@frozen(kw_only=True)
-class AbstractSetting(ABC):
+@frozen(kw_only=True, weakref_slot=False)
+class AbstractSetting:
     """Abstract parent class for all types of config settings."""
 
     id: str
     name: str
     description: str
-    required: Optional[bool] = False
+    required: bool = False
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class DeviceSetting(AbstractSetting):
     """A DEVICE setting."""
 
@@ -148,7 +162,7 @@ class DeviceSetting(AbstractSetting):
     permissions: List[str]
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class TextSetting(AbstractSetting):
     """A TEXT setting."""
 
@@ -156,7 +170,7 @@ class TextSetting(AbstractSetting):
     default_value: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class BooleanSetting(AbstractSetting):
     """A BOOLEAN setting."""
 
@@ -164,7 +178,7 @@ class BooleanSetting(AbstractSetting):
     default_value: BooleanValue
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False, cache_hash=True)
 class EnumOption:
     """An option within an ENUM setting"""
 
@@ -172,7 +186,7 @@ class EnumOption:
     name: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class EnumOptionGroup:
     """A group of options within an ENUM setting"""
 
@@ -180,7 +194,7 @@ class EnumOptionGroup:
     options: List[EnumOption]
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class EnumSetting(AbstractSetting):
     """An ENUM setting."""
 
@@ -190,7 +204,7 @@ class EnumSetting(AbstractSetting):
     grouped_options: Optional[List[EnumOptionGroup]] = None
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class LinkSetting(AbstractSetting):
     """A LINK setting."""
 
@@ -199,7 +213,7 @@ class LinkSetting(AbstractSetting):
     image: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class PageSetting(AbstractSetting):
     """A PAGE setting."""
 
@@ -208,7 +222,7 @@ class PageSetting(AbstractSetting):
     image: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ImageSetting(AbstractSetting):
     """An IMAGE setting."""
 
@@ -216,7 +230,7 @@ class ImageSetting(AbstractSetting):
     image: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class IconSetting(AbstractSetting):
     """An ICON setting."""
 
@@ -224,14 +238,14 @@ class IconSetting(AbstractSetting):
     image: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class TimeSetting(AbstractSetting):
     """A TIME setting."""
 
     type: ConfigSettingType = ConfigSettingType.TIME
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ParagraphSetting(AbstractSetting):
     """A PARAGRAPH setting."""
 
@@ -239,35 +253,35 @@ class ParagraphSetting(AbstractSetting):
     default_value: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class EmailSetting(AbstractSetting):
     """An EMAIL setting."""
 
     type: ConfigSettingType = ConfigSettingType.EMAIL
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class DecimalSetting(AbstractSetting):
     """A DECIMAL setting."""
 
     type: ConfigSettingType = ConfigSettingType.DECIMAL
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class NumberSetting(AbstractSetting):
     """A NUMBER setting."""
 
     type: ConfigSettingType = ConfigSettingType.NUMBER
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class PhoneSetting(AbstractSetting):
     """A PHONE setting."""
 
     type: ConfigSettingType = ConfigSettingType.PHONE
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class OauthSetting(AbstractSetting):
     """An OAUTH setting."""
 
@@ -295,13 +309,13 @@ ConfigSetting = Union[
 ]
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False, cache_hash=True)
 class DeviceValue:
     device_id: str
     component_id: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class DeviceConfigValue:
     """DEVICE configuration value."""
 
@@ -309,12 +323,12 @@ class DeviceConfigValue:
     value_type: ConfigValueType = ConfigValueType.DEVICE
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False, cache_hash=True)
 class StringValue:
     value: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class StringConfigValue:
     """STRING configuration value."""
 
@@ -328,7 +342,12 @@ ConfigValue = Union[
 ]
 
 
-@frozen(kw_only=True)
+# These pull values out of the config values in a single C-level call, rather than a chain of attribute lookups
+STRING_CONFIG_VALUE = attrgetter("string_config.value")
+DEVICE_CONFIG = attrgetter("device_config")
+
+
+@frozen(kw_only=True, weakref_slot=False)
 class InstalledApp:
     """Installed application."""
 
@@ -339,15 +358,15 @@ class InstalledApp:
 
     def as_devices(self, key: str) -> List[DeviceValue]:
         """Return a list of devices for a named configuration value."""
-        return [item.device_config for item in self.config[key]]  # type: ignore
+        return list(map(DEVICE_CONFIG, self.config[key]))
 
     def as_str(self, key: str) -> str:
         """Return a named configuration value, interpreted as a string"""
-        return self.config[key][0].string_config.value  # type: ignore
+        return STRING_CONFIG_VALUE(self.config[key][0])  # type: ignore[no-any-return]
 
     def as_bool(self, key: str) -> bool:
         """Return a named configuration value, interpreted as a boolean"""
-        return bool(self.as_str(key))
+        return self.as_str(key) in BOOLEAN_TRUE_VALUES
 
     def as_int(self, key: str) -> int:
         """Return a named configuration value, interpreted as an integer"""
@@ -358,7 +377,7 @@ class InstalledApp:
         return float(self.as_str(key))
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class Event:
     """Holds the triggered event, one of several different attributes depending on event type."""
 
@@ -378,34 +397,13 @@ class Event:
     weather_data: Optional[Dict[str, Any]] = None
     air_quality_data: Optional[Dict[str, Any]] = None
 
-    def for_type(self, event_type: EventType) -> Optional[Dict[str, Any]]:  # pylint: disable=too-many-return-statements
+    def for_type(self, event_type: EventType) -> Optional[Dict[str, Any]]:
         """Return the attribute associated with an event type."""
-        if event_type == EventType.DEVICE_COMMANDS_EVENT:
-            return self.device_commands_event
-        elif event_type == EventType.DEVICE_EVENT:
-            return self.device_event
-        elif event_type == EventType.DEVICE_HEALTH_EVENT:
-            return self.device_health_event
-        elif event_type == EventType.DEVICE_LIFECYCLE_EVENT:
-            return self.device_lifecycle_event
-        elif event_type == EventType.HUB_HEALTH_EVENT:
-            return self.hub_health_event
-        elif event_type == EventType.INSTALLED_APP_LIFECYCLE_EVENT:
-            return self.installed_app_lifecycle_event
-        elif event_type == EventType.MODE_EVENT:
-            return self.mode_event
-        elif event_type == EventType.SCENE_LIFECYCLE_EVENT:
-            return self.scene_lifecycle_event
-        elif event_type == EventType.SECURITY_ARM_STATE_EVENT:
-            return self.security_arm_state_event
-        elif event_type == EventType.TIMER_EVENT:
-            return self.timer_event
-        elif event_type == EventType.WEATHER_EVENT:
-            return self.weather_event
-        return None
-
-
-@frozen(kw_only=True)
+        getter = EVENT_ATTRIBUTE_BY_TYPE.get(event_type)
+        return getter(self) if getter else None
+
+
+@frozen(kw_only=True, weakref_slot=False)
 class ConfirmationData:
     """Confirmation data."""
 
@@ -413,7 +411,7 @@ class ConfirmationData:
     confirmation_url: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigInit:
     """Initialization data."""
 
@@ -424,7 +422,7 @@ class ConfigInit:
     first_page_id: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigRequestData:
     """Configuration data provided on the request."""
 
@@ -435,14 +433,14 @@ class ConfigRequestData:
     config: Dict[str, List[ConfigValue]]
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigInitData:
     """Configuration data provided in an INITIALIZATION response."""
 
     initialize: ConfigInit
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigSection:
     """A section within a configuration page."""
 
@@ -450,7 +448,7 @@ class ConfigSection:
     settings: List[ConfigSetting]
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigPage:
     """A page of configuration data for the CONFIGURATION phase."""
 
@@ -462,14 +460,14 @@ class ConfigPage:
     sections: List[ConfigSection]
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigPageData:
     """Configuration data provided in an PAGE response."""
 
     page: ConfigPage
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class InstallData:
     """Install data."""
 
@@ -512,7 +510,7 @@ class InstallData:
         return self.installed_app.as_float(key)
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class UpdateData:
     """Update data."""
 
@@ -557,7 +555,7 @@ class UpdateData:
         return self.installed_app.as_float(key)
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class UninstallData:
     """Install data."""
 
@@ -572,13 +570,13 @@ class UninstallData:
         return self.installed_app.location_id
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False, cache_hash=True)
 class OauthCallbackData:
     installed_app_id: str
     url_path: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class EventData:
     """Event data."""
 
@@ -586,7 +584,8 @@ class EventData:
 
     auth_token: str = field(repr=False)
     installed_app: InstalledApp
-    events: List[Event]
+    events: Tuple[Event, ...] = field(converter=tuple)
+    _by_type: Optional[Dict[EventType, List[Dict[str, Any]]]] = field(default=None, init=False, repr=False, eq=False)
 
     def token(self) -> str:
         """Return the auth token associated with this request."""
@@ -602,211 +601,221 @@ class EventData:
 
     def for_type(self, event_type: EventType) -> List[Dict[str, Any]]:
         """Get all events for a particular event type, possibly empty."""
-        return [
-            event.for_type(event_type)  # type: ignore
-            for event in self.events
-            if event.event_type == event_type and event.for_type(event_type) is not None
-        ]
+        return list(self._events_by_type().get(event_type, ()))
 
     def filter(self, event_type: EventType, predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
         """Apply a filter to a set of events with a particular event type."""
-        return list(filter(predicate, self.for_type(event_type)))
-
-
-@frozen(kw_only=True)
+        return list(filter(predicate, self._events_by_type().get(event_type, ())))
+
+    def _events_by_type(self) -> Dict[EventType, List[Dict[str, Any]]]:
+        """Group the events by type, in a single pass the first time it's needed, so later lookups don't need to scan."""
+        # The groups are built locally and only published once complete, so a concurrent caller
+        # never sees a partial result; at worst, two callers both build the same groups
+        by_type = self._by_type
+        if by_type is None:
+            by_type = {}
+            for event in self.events:
+                payload = event.for_type(event.event_type)
+                if payload is not None:
+                    by_type.setdefault(event.event_type, []).append(payload)
+            object.__setattr__(self, "_by_type", by_type)  # the class is frozen, but this is only a cache
+        return by_type
+
+
+@frozen(kw_only=True, weakref_slot=False)
 class ConfirmationRequest(AbstractRequest):
     """Request for CONFIRMATION phase"""
 
     app_id: str
     confirmation_data: ConfirmationData
-    settings: Dict[str, Any] = field(factory=dict)
+    settings: Mapping[str, Any] = EMPTY_MAPPING
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfirmationResponse:
     """Response for CONFIRMATION phase"""
 
     target_url: str
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigurationRequest(AbstractRequest):
     """Request for CONFIGURATION phase"""
 
     configuration_data: ConfigRequestData
-    settings: Dict[str, Any] = field(factory=dict)
+    settings: Mapping[str, Any] = EMPTY_MAPPING
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigurationInitResponse:
     """Response for CONFIGURATION/INITIALIZE phase"""
 
     configuration_data: ConfigInitData
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class ConfigurationPageResponse:
     """Response for CONFIGURATION/PAGE phase"""
 
     configuration_data: ConfigPageData
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class InstallRequest(AbstractRequest):
     """Request for INSTALL phase"""
 
     install_data: InstallData
-    settings: Dict[str, Any] = field(factory=dict)
+    settings: Mapping[str, Any] = EMPTY_MAPPING
 
     def token(self) -> str:
         """Return the auth token associated with this request."""
-        return self.install_data.token()
+        return self.install_data.auth_token
 
     def app_id(self) -> str:
         """Return the installed application id associated with this request."""
-        return self.install_data.app_id()
+        return self.install_data.installed_app.installed_app_id
 
     def location_id(self) -> str:
         """Return the installed location id associated with this request."""
-        return self.install_data.location_id()
+        return self.install_data.installed_app.location_id
 
     def as_devices(self, key: str) -> List[DeviceValue]:
         """Return a list of devices for a named configuration value."""
-        return self.install_data.as_devices(key)
+        return self.install_data.installed_app.as_devices(key)
 
     def as_str(self, key: str) -> str:
         """Return a named configuration value, interpreted as a string"""
-        return self.install_data.as_str(key)
+        return self.install_data.installed_app.as_str(key)
 
     def as_bool(self, key: str) -> bool:
         """Return a named configuration value, interpreted as a boolean"""
-        return self.install_data.as_bool(key)
+        return self.install_data.installed_app.as_bool(key)
 
     def as_int(self, key: str) -> int:
         """Return a named configuration value, interpreted as an integer"""
-        return self.install_data.as_int(key)
+        return self.install_data.installed_app.as_int(key)
 
     def as_float(self, key: str) -> float:
         """Return a named configuration value, interpreted as a float"""
-        return self.install_data.as_float(key)
+        return self.install_data.installed_app.as_float(key)
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class InstallResponse:
     """Response for INSTALL phase"""
 
-    install_data: Dict[str, Any] = field(factory=dict)  # always empty in the response
+    install_data: Mapping[str, Any] = EMPTY_MAPPING  # always empty in the response
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class UpdateRequest(AbstractRequest):
     """Request for UPDATE phase"""
 
     update_data: UpdateData
-    settings: Dict[str, Any] = field(factory=dict)
+    settings: Mapping[str, Any] = EMPTY_MAPPING
 
     def token(self) -> str:
         """Return the auth token associated with this request."""
-        return self.update_data.token()
+        return self.update_data.auth_token
 
     def app_id(self) -> str:
         """Return the installed application id associated with this request."""
-        return self.update_data.app_id()
+        return self.update_data.installed_app.installed_app_id
 
     def location_id(self) -> str:
         """Return the installed location id associated with this request."""
-        return self.update_data.location_id()
+        return self.update_data.installed_app.location_id
 
     def as_devices(self, key: str) -> List[DeviceValue]:
         """Return a list of devices for a named configuration value."""
-        return self.update_data.as_devices(key)
+        return self.update_data.installed_app.as_devices(key)
 
     def as_str(self, key: str) -> str:
         """Return a named configuration value, interpreted as a string"""
-        return self.update_data.as_str(key)
+        return self.update_data.installed_app.as_str(key)
 
     def as_bool(self, key: str) -> bool:
         """Return a named configuration value, interpreted as a boolean"""
-        return self.update_data.as_bool(key)
+        return self.update_data.installed_app.as_bool(key)
 
     def as_int(self, key: str) -> int:
         """Return a named configuration value, interpreted as an integer"""
-        return self.update_data.as_int(key)
+        return self.update_data.installed_app.as_int(key)
 
     def as_float(self, key: str) -> float:
         """Return a named configuration value, interpreted as a float"""
-        return self.update_data.as_float(key)
+        return self.update_data.installed_app.as_float(key)
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class UpdateResponse:
     """Response for UPDATE phase"""
 
-    update_data: Dict[str, Any] = field(factory=dict)  # always empty in the response
+    update_data: Mapping[str, Any] = EMPTY_MAPPING  # always empty in the response
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class UninstallRequest(AbstractRequest):
     """Request for UNINSTALL phase"""
 
     uninstall_data: UninstallData
-    settings: Dict[str, Any] = field(factory=dict)
+    settings: Mapping[str, Any] = EMPTY_MAPPING
 
     def app_id(self) -> str:
         """Return the installed application id associated with this request."""
-        return self.uninstall_data.app_id()
+        return self.uninstall_data.installed_app.installed_app_id
 
     def location_id(self) -> str:
         """Return the installed location id associated with this request."""
-        return self.uninstall_data.location_id()
+        return self.uninstall_data.installed_app.location_id
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class UninstallResponse:
     """Response for UNINSTALL phase"""
 
-    uninstall_data: Dict[str, Any] = field(factory=dict)  # always empty in the response
+    uninstall_data: Mapping[str, Any] = EMPTY_MAPPING  # always empty in the response
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class OauthCallbackRequest(AbstractRequest):
     """Request for OAUTH_CALLBACK phase"""
 
     o_auth_callback_data: OauthCallbackData
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class OauthCallbackResponse:
     """Response for OAUTH_CALLBACK phase"""
 
-    o_auth_callback_data: Dict[str, Any] = field(factory=dict)  # always empty in the response
+    o_auth_callback_data: Mapping[str, Any] = EMPTY_MAPPING  # always empty in the response
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class EventRequest(AbstractRequest):
     """Request for EVENT phase"""
 
     event_data: EventData
-    settings: Dict[str, Any] = field(factory=dict)
+    settings: Mapping[str, Any] = EMPTY_MAPPING
 
     def token(self) -> str:
         """Return the auth token associated with this request."""
-        return self.event_data.token()
+        return self.event_data.auth_token
 
     def app_id(self) -> str:
         """Return the installed application id associated with this request."""
-        return self.event_data.app_id()
+        return self.event_data.installed_app.installed_app_id
 
     def location_id(self) -> str:
         """Return the installed location id associated with this request."""
-        return self.event_data.location_id()
+        return self.event_data.installed_app.location_id
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class EventResponse:
     """Response for EVENT phase"""
 
-    event_data: Dict[str, Any] = field(factory=dict)  # always empty in the response
+    event_data: Mapping[str, Any] = EMPTY_MAPPING  # always empty in the response
 
 
 LifecycleRequest = Union[
@@ -830,64 +839,99 @@ LifecycleResponse = Union[
     EventResponse,
 ]
 
-REQUEST_BY_PHASE = {
-    LifecyclePhase.CONFIGURATION: ConfigurationRequest,
-    LifecyclePhase.CONFIRMATION: ConfirmationRequest,
-    LifecyclePhase.INSTALL: InstallRequest,
-    LifecyclePhase.UPDATE: UpdateRequest,
-    LifecyclePhase.UNINSTALL: UninstallRequest,
-    LifecyclePhase.OAUTH_CALLBACK: OauthCallbackRequest,
-    LifecyclePhase.EVENT: EventRequest,
-}
-
-CONFIG_VALUE_BY_TYPE = {
-    ConfigValueType.DEVICE: DeviceConfigValue,
-    ConfigValueType.STRING: StringConfigValue,
-}
-
-CONFIG_SETTING_BY_TYPE = {
-    ConfigSettingType.DEVICE: DeviceSetting,
-    ConfigSettingType.TEXT: TextSetting,
-    ConfigSettingType.BOOLEAN: BooleanSetting,
-    ConfigSettingType.ENUM: EnumSetting,
-    ConfigSettingType.LINK: LinkSetting,
-    ConfigSettingType.PAGE: PageSetting,
-    ConfigSettingType.IMAGE: ImageSetting,
-    ConfigSettingType.ICON: IconSetting,
-    ConfigSettingType.TIME: TimeSetting,
-    ConfigSettingType.PARAGRAPH: ParagraphSetting,
-    ConfigSettingType.EMAIL: EmailSetting,
-    ConfigSettingType.DECIMAL: DecimalSetting,
-    ConfigSettingType.NUMBER: NumberSetting,
-    ConfigSettingType.PHONE: PhoneSetting,
-    ConfigSettingType.OAUTH: OauthSetting,
-}
-
-
-@frozen
+EVENT_ATTRIBUTE_BY_TYPE = MappingProxyType(
+    {
+        EventType.DEVICE_COMMANDS_EVENT: attrgetter("device_commands_event"),
+        EventType.DEVICE_EVENT: attrgetter("device_event"),
+        EventType.DEVICE_HEALTH_EVENT: attrgetter("device_health_event"),
+        EventType.DEVICE_LIFECYCLE_EVENT: attrgetter("device_lifecycle_event"),
+        EventType.HUB_HEALTH_EVENT: attrgetter("hub_health_event"),
+        EventType.INSTALLED_APP_LIFECYCLE_EVENT: attrgetter("installed_app_lifecycle_event"),
+        EventType.MODE_EVENT: attrgetter("mode_event"),
+        EventType.SCENE_LIFECYCLE_EVENT: attrgetter("scene_lifecycle_event"),
+        EventType.SECURITY_ARM_STATE_EVENT: attrgetter("security_arm_state_event"),
+        EventType.TIMER_EVENT: attrgetter("timer_event"),
+        EventType.WEATHER_EVENT: attrgetter("weather_event"),
+    }
+)
+
+REQUEST_BY_PHASE = MappingProxyType(
+    {
+        LifecyclePhase.CONFIGURATION: ConfigurationRequest,
+        LifecyclePhase.CONFIRMATION: ConfirmationRequest,
+        LifecyclePhase.INSTALL: InstallRequest,
+        LifecyclePhase.UPDATE: UpdateRequest,
+        LifecyclePhase.UNINSTALL: UninstallRequest,
+        LifecyclePhase.OAUTH_CALLBACK: OauthCallbackRequest,
+        LifecyclePhase.EVENT: EventRequest,
+    }
+)
+
+CONFIG_VALUE_BY_TYPE = MappingProxyType(
+    {
+        ConfigValueType.DEVICE: DeviceConfigValue,
+        ConfigValueType.STRING: StringConfigValue,
+    }
+)
+
+CONFIG_SETTING_BY_TYPE = MappingProxyType(
+    {
+        ConfigSettingType.DEVICE: DeviceSetting,
+        ConfigSettingType.TEXT: TextSetting,
+        ConfigSettingType.BOOLEAN: BooleanSetting,
+        ConfigSettingType.ENUM: EnumSetting,
+        ConfigSettingType.LINK: LinkSetting,
+        ConfigSettingType.PAGE: PageSetting,
+        ConfigSettingType.IMAGE: ImageSetting,
+        ConfigSettingType.ICON: IconSetting,
+        ConfigSettingType.TIME: TimeSetting,
+        ConfigSettingType.PARAGRAPH: ParagraphSetting,
+        ConfigSettingType.EMAIL: EmailSetting,
+        ConfigSettingType.DECIMAL: DecimalSetting,
+        ConfigSettingType.NUMBER: NumberSetting,
+        ConfigSettingType.PHONE: PhoneSetting,
+        ConfigSettingType.OAUTH: OauthSetting,
+    }
+)
+
+# Each of these identifies the attribute that discriminates between the classes in a union, plus the table of classes
+# keyed by that attribute's value, so a deserializer can pick the right class with a single lookup
+CONFIG_VALUE_TAG = ("value_type", CONFIG_VALUE_BY_TYPE)
+CONFIG_SETTING_TAG = ("type", CONFIG_SETTING_BY_TYPE)
+REQUEST_TAG = ("lifecycle", REQUEST_BY_PHASE)
+
+
 class SmartAppError(Exception):
     """An error tied to the SmartApp implementation."""
 
-    message: str
-    correlation_id: Optional[str] = None
+    # This is a plain exception rather than an attrs class, so raising one is cheap and it pickles cleanly
+
+    def __init__(self, message: str, correlation_id: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.correlation_id = correlation_id
+
+    @property
+    def message(self) -> str:
+        """The error message, which is also the exception's only argument."""
+        return self.args[0]  # type: ignore[no-any-return]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(message={self.message!r}, correlation_id={self.correlation_id!r})"
 
 
-@frozen
 class InternalError(SmartAppError):
     """An internal error was encountered processing a lifecycle event."""
 
 
-@frozen
 class BadRequestError(SmartAppError):
     """A lifecycle event was invalid."""
 
 
-@frozen
 class SignatureError(SmartAppError):
     """The request signature on a lifecycle event was invalid."""
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class SmartAppDispatcherConfig:
     # noinspection PyUnresolvedReferences
     """
@@ -974,7 +1018,7 @@ class SmartAppEventHandler(ABC):
         """Handle an EVENT lifecycle request."""
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class SmartAppConfigPage:
     """
     A page of configuration for the SmartApp.
@@ -984,7 +1028,7 @@ class SmartAppConfigPage:
     sections: List[ConfigSection]
 
 
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class SmartAppDefinition:
     # noinspection PyUnresolvedReferences
     """
@@ -1029,6 +1073,8 @@ class SmartAppConfigManager(ABC):
     build responses.
     """
 
+    __slots__ = ()  # so slotted subclasses like the dispatcher's StaticConfigManager don't get a __dict__
+
     def handle_initialize(self, request: ConfigurationRequest, definition: SmartAppDefinition) -> ConfigurationInitResponse:
         """Handle a CONFIGURATION INITIALIZE lifecycle request."""
         return self.build_init_response(
@@ -1043,8 +1089,9 @@ class SmartAppConfigManager(ABC):
     def handle_page(self, request: ConfigurationRequest, definition: SmartAppDefinition, page_id: int) -> ConfigurationPageResponse:
         """Handle a CONFIGURATION PAGE lifecycle request."""
 
+    @staticmethod
     def build_init_response(
-        self, id: str, name: str, description: str, permissions: List[str], first_page_id: int
+        id: str, name: str, description: str, permissions: List[str], first_page_id: int
     ) -> ConfigurationInitResponse:
         """Build a ConfigurationInitResponse."""
         return ConfigurationInitResponse(
@@ -1059,8 +1106,8 @@ class SmartAppConfigManager(ABC):
             )
         )
 
+    @staticmethod
     def build_page_response(
-        self,
         page_id: int,
         name: str,
         previous_page_id: Optional[int],
@@ -1084,7 +1131,7 @@ class SmartAppConfigManager(ABC):
 
 
 # noinspection PyUnresolvedReferences
-@frozen(kw_only=True)
+@frozen(kw_only=True, weakref_slot=False)
 class SmartAppRequestContext:
     """
     The context for a SmartApp lifecycle request.
@@ -1110,23 +1157,25 @@ class SmartAppRequestContext:
         # in conjunction with header(), this gives us a case-insensitive dictionary
         return {key.lower(): value for (key, value) in self.headers.items()} if self.headers else {}
 
+    # The header name constants are already lowercase, so the defaults below can
+    # go straight to the normalized dictionary without lowercasing on every request.
+
     @correlation_id.default
     def _default_correlation_id(self) -> Optional[str]:
-        return self.header(CORRELATION_ID_HEADER)
+        return self._normalized_header(CORRELATION_ID_HEADER)
 
     @signature.default
     def _default_signature(self) -> Optional[str]:
-        return self.header(AUTHORIZATION_HEADER)
+        return self._normalized_header(AUTHORIZATION_HEADER)
 
     @date.default
     def _default_date(self) -> Optional[str]:
-        return self.header(DATE_HEADER)
+        return self._normalized_header(DATE_HEADER)
 
     def header(self, name: str) -> Optional[str]:
         """Return the named header case-insensitively, or None if not found."""
-        if not name.lower() in self.normalized:
-            return None
-        value = self.normalized[name.lower()]
-        if not value or not value.strip():
-            return None
-        return value
+        return self._normalized_header(name.lower())
+
+    def _normalized_header(self, key: str) -> Optional[str]:
+        value = self.normalized.get(key)
+        return value if value and not value.isspace() else None
@@ -32,6 +32,10 @@ Verify HTTP signatures on SmartApp lifecycle event requests.
 # total attempts), waiting 0.25 seconds before first retry, and limiting the wait between
 # retries to 2 seconds.  This is not configurable.  Note that the LRU cache only caches
 # responses, not any exceptions that were thrown.
+#
+# The target_path() function is cached for a similar reason.  The path is derived only
+# from the SmartApp definition, which doesn't change for the lifetime of a dispatcher, so
+# there's no need to re-parse the target URL for every request we verify.
 
 import logging
 import re
@@ -72,6 +76,16 @@ def retrieve_public_key(key_server_url: str, key_id: str) -> str:
     return response.text
 
 
+@lru_cache(maxsize=32)
+def target_path(target_url: str) -> str:
+    """Derive the request path (including any query) from a target URL, caching the result."""
+    parts = urllib.parse.urlsplit(target_url)
+    path = parts.path
+    if parts.query:
+        path = "%s?%s" % (path, parts.query)
+    return path
+
+
 DATE_FORMAT = "DD MMM YYYY HH:mm:ss z"  # like "05 Jan 2014 21:31:40 GMT"; we strip off the leading day of week
 
 
@@ -114,11 +128,7 @@ class SignatureVerifier:
     @path.default
     def _default_path(self) -> str:
         # The path from the configured endpoint might be different than what the server served, due to forwarding
-        parts = urllib.parse.urlsplit(self.definition.target_url)
-        path = parts.path
-        if parts.query:
-            path = "%s?%s" % (path, parts.query)
-        return path
+        return target_path(self.definition.target_url)
 
     @request_target.default
     def _default_request_target(self) -> str:
@@ -1,15 +1,25 @@
 # -*- coding: utf-8 -*-
 # vim: set ft=python ts=4 sw=4 expandtab:
-# pylint: disable=redefined-outer-name,invalid-name,wildcard-import:
+# pylint: disable=redefined-outer-name,invalid-name,too-many-lines,wildcard-import:
 
+import math
 import os
+import sys
 from json import JSONDecodeError
+from typing import Dict, List
 from unittest.mock import patch
 
 import pendulum
 import pytest
 
-from smartapp.converter import CONVERTER, deserialize_datetime, serialize_datetime
+from smartapp.converter import (
+    CONVERTER,
+    StandardConverter,
+    deserialize_datetime,
+    dumps_json,
+    loads_json,
+    serialize_datetime,
+)
 from smartapp.interface import *
 from tests.testutil import load_dir
 
@@ -54,6 +64,21 @@ def validate_yaml_roundtrip(yaml, expected, cls):
     assert converted == expected and converted is not expected
 
 
+def validate_json_functions(responses):
+    """Validate the JSON functions, which produce and accept equivalent JSON whether or not orjson is available."""
+    assert loads_json(dumps_json({"a": ["b", 1, True, None]})) == {"a": ["b", 1, True, None]}
+    assert loads_json(dumps_json({"a": ["b", 1, True, None]}).encode("utf-8")) == {"a": ["b", 1, True, None]}
+    assert dumps_json({"a": {"b": "c"}}) == '{\n  "a": {\n    "b": "c"\n  }\n}'
+    assert loads_json(dumps_json({1: "a", None: "b"})) == {"1": "a", "null": "b"}
+    assert dumps_json(2**70) == "1180591620717411303424"
+    assert math.isnan(loads_json('{"a": NaN}')["a"])
+    assert loads_json('"\\ud800"') == "\ud800"
+    with pytest.raises(JSONDecodeError):
+        loads_json("*(&)(&_)()")
+    validate_json_roundtrip(responses["CONFIRMATION.json"], ConfirmationResponse(target_url="{TARGET_URL}"), ConfirmationResponse)
+    assert CONVERTER.from_json(responses["CONFIRMATION.json"].encode("utf-8"), ConfirmationResponse).target_url == "{TARGET_URL}"
+
+
 class TestDatetime:
     @pytest.mark.parametrize(
         "datetime,expected",
@@ -61,6 +86,10 @@ class TestDatetime:
             (pendulum.datetime(2017, 9, 13, 4, 18, 12, microsecond=469000, tz="UTC"), "2017-09-13T04:18:12.469Z"),
             (pendulum.datetime(2017, 9, 13, 4, 18, 12, microsecond=0, tz="UTC"), "2017-09-13T04:18:12.000Z"),
             (pendulum.datetime(1970, 1, 1, 0, 0, 0, microsecond=0, tz="UTC"), "1970-01-01T00:00:00.000Z"),
+            (pendulum.datetime(2017, 9, 13, 4, 18, 12, microsecond=469999, tz="UTC"), "2017-09-13T04:18:12.469Z"),
+            (pendulum.datetime(2017, 9, 13, 4, 18, 12, microsecond=469000, tz="Europe/London"), "2017-09-13T03:18:12.469Z"),
+            (pendulum.datetime(2017, 1, 13, 4, 18, 12, microsecond=469000, tz="Europe/London"), "2017-01-13T04:18:12.469Z"),
+            (pendulum.datetime(2022, 6, 16, 10, 17, 24, microsecond=883000, tz="America/Chicago"), "2022-06-16T15:17:24.883Z"),
         ],
     )
     def test_serialize_datetime(self, datetime, expected):
@@ -96,6 +125,47 @@ class TestDatetime:
         with pytest.raises(ValueError, match="Unknown datetime format"):
             deserialize_datetime(datetime)
 
+    @pytest.mark.parametrize(
+        "datetime",
+        [
+            "2017-13-13T04:18:12.469Z",  # invalid month
+            "2017-09-13T04:18:12.46xZ",  # invalid milliseconds
+            "2017-09-13 04:18:12.469Z",  # no T separator
+            "2017-09-13 04:18:12Z",  # no T separator
+            "2017-09-13T04:18+01Z",  # UTC offset instead of seconds
+            "2017-09-13T04:18:12,469Z",  # comma before milliseconds
+            "2017-W37-3T04:18:12.469Z",  # ISO week date
+        ],
+    )
+    def test_deserialize_datetime_unparseable(self, datetime):
+        with pytest.raises(ValueError):
+            deserialize_datetime(datetime)
+
+
+class TestJson:
+    def test_orjson(self, responses):
+        pytest.importorskip("orjson")
+        validate_json_functions(responses)
+
+    @patch("smartapp.converter.orjson", None)
+    def test_stdlib(self, responses):
+        validate_json_functions(responses)
+
+
+class SnakeCaseConverter(StandardConverter):
+    """Converter that leaves attribute names alone."""
+
+    def _to_camel_case(self, name: str) -> str:
+        return name
+
+
+class TestConverterInstances:
+    def test_subclass_camel_case_names(self):
+        response = ConfirmationResponse(target_url="url")
+        assert '"targetUrl"' in CONVERTER.to_json(response)
+        assert '"target_url"' in SnakeCaseConverter().to_json(response)
+        assert SnakeCaseConverter().from_json('{"target_url": "url"}', ConfirmationResponse) == response
+
 
 class TestConvertSettings:
     def test_boolean(self, settings):
@@ -110,6 +180,13 @@ class TestConvertSettings:
         validate_json_roundtrip(json, expected, BooleanSetting)
         validate_yaml_roundtrip(None, expected, BooleanSetting)
 
+    def test_boolean_enum(self):
+        setting = BooleanSetting(id="id", name="name", description="description", default_value=BooleanValue.TRUE)
+        assert CONVERTER.unstructure(setting)["defaultValue"] == "true"
+        assert CONVERTER.unstructure(setting)["type"] == "BOOLEAN"
+        assert "defaultValue: 'true'" in CONVERTER.to_yaml(setting)
+        assert CONVERTER.from_yaml(CONVERTER.to_yaml(setting), BooleanSetting) == setting
+
     def test_decimal(self, settings):
         json = settings["DECIMAL.json"]
         expected = DecimalSetting(
@@ -462,8 +539,56 @@ class TestConvertRequests:
 
     def test_mismatch_json(self):
         # This is valid JSON, just not valid LifecycleRequest
-        with pytest.raises(ValueError):
+        with pytest.raises(ValueError, match="Unknown lifecycle phase"):
             CONVERTER.from_json('{"hello": "there"}', LifecycleRequest)
+        with pytest.raises(ValueError, match="Unknown lifecycle phase"):
+            CONVERTER.from_json('{"lifecycle": "BOGUS"}', LifecycleRequest)
+
+    def test_unknown_config_value_type(self):
+        with pytest.raises(ValueError, match="Unknown config value type"):
+            CONVERTER.from_json('{"valueType": "BOGUS"}', ConfigValue)
+
+    def test_config_value_list(self):
+        data = (
+            '[{"valueType": "STRING", "stringConfig": {"value": "x"}}, '
+            '{"valueType": "DEVICE", "deviceConfig": {"deviceId": "d", "componentId": "c"}}]'
+        )
+        assert CONVERTER.from_json(data, List[ConfigValue]) == [
+            StringConfigValue(string_config=StringValue(value="x")),
+            DeviceConfigValue(device_config=DeviceValue(device_id="d", component_id="c")),
+        ]
+        with pytest.raises(ValueError, match="Unknown config value type"):
+            CONVERTER.from_json(
+                '[{"valueType": "STRING", "stringConfig": {"value": "x"}}, {"valueType": "BOGUS"}]', List[ConfigValue]
+            )
+
+    def test_config_mapping(self):
+        key = "".join(["my", "-", "key"])  # built at runtime, so it isn't interned already
+        data = '{"%s": [{"valueType": "STRING", "stringConfig": {"value": "x"}}]}' % key
+        config = CONVERTER.from_json(data, Dict[str, List[ConfigValue]])
+        assert config == {"my-key": [StringConfigValue(string_config=StringValue(value="x"))]}
+        assert next(iter(config)) is sys.intern(key)
+
+    def test_config_setting_list(self):
+        settings = [
+            ParagraphSetting(id="p", name="paragraph", description="description", default_value="text"),
+            DeviceSetting(
+                id="d", name="device", description="description", multiple=False, capabilities=["switch"], permissions=["r"]
+            ),
+        ]
+        data = CONVERTER.unstructure(settings, unstructure_as=List[ConfigSetting])
+        assert [item["type"] for item in data] == ["PARAGRAPH", "DEVICE"]
+        assert CONVERTER.structure(data, List[ConfigSetting]) == settings
+
+    def test_enum(self):
+        for event_type in EventType:
+            assert CONVERTER.structure(event_type.value, EventType) is event_type
+        with pytest.raises(ValueError, match="'BOGUS' is not a valid EventType"):
+            CONVERTER.structure("BOGUS", EventType)
+
+    def test_unknown_config_setting_type(self):
+        with pytest.raises(ValueError, match="Unknown config setting type"):
+            CONVERTER.from_json('{"type": "BOGUS"}', ConfigSetting)
 
     def test_confirmation(self, requests):
         json = requests["CONFIRMATION.json"]
@@ -8,7 +8,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from smartapp.converter import CONVERTER
-from smartapp.dispatcher import SmartAppDispatcher
+from smartapp.dispatcher import SmartAppDispatcher, StaticConfigManager
 from smartapp.interface import *
 from tests.testutil import load_dir
 
@@ -93,6 +93,16 @@ def dispatcher_with_check(definition: SmartAppDefinition, event_handler: SmartAp
     )
 
 
+class TestStaticConfigManager:
+    def test_build_without_instance(self):
+        init = SmartAppConfigManager.build_init_response("id", "name", "description", [], 1)
+        assert init == StaticConfigManager().build_init_response("id", "name", "description", [], 1)
+        page = SmartAppConfigManager.build_page_response(2, "page", 1, None, True, [])
+        assert page.configuration_data.page.page_id == "2"
+        assert page.configuration_data.page.previous_page_id == "1"
+        assert page.configuration_data.page.next_page_id is None
+
+
 # noinspection PyUnresolvedReferences
 class TestSmartAppDispatcher:
     def test_invalid_json(self, dispatcher):
@@ -115,6 +125,25 @@ class TestSmartAppDispatcher:
             dispatcher.dispatch(SmartAppRequestContext(headers=HEADERS, body=request_json))
         assert e.value.correlation_id == CORRELATION
 
+    def test_handler_bad_request(self, dispatcher):
+        # a ValueError raised while handling the request is treated as a bad request
+        request = ConfigurationRequest(
+            lifecycle=LifecyclePhase.CONFIGURATION,
+            execution_id="execution_id",
+            locale="locale",
+            version="version",
+            configuration_data=ConfigRequestData(
+                installed_app_id="installed_app_id",
+                phase=ConfigPhase.PAGE,
+                page_id="3",
+                previous_page_id="2",
+                config={},
+            ),
+        )
+        with pytest.raises(BadRequestError, match="Page not found: 3") as e:
+            dispatcher.dispatch(SmartAppRequestContext(headers=HEADERS, body=CONVERTER.to_json(request)))
+        assert e.value.correlation_id == CORRELATION
+
     @patch("smartapp.dispatcher.SignatureVerifier")
     def test_disabled_signature(self, signature_verifier, requests, dispatcher):
         # all of the requests have the same behavior, so we just check it once
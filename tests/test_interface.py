@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 # vim: set ft=python ts=4 sw=4 expandtab:
 # pylint: disable=redefined-outer-name,invalid-name,wildcard-import:
+import inspect
 import os
+import pickle
+from unittest.mock import patch
 
+import attrs
 import pytest
 
+from smartapp import dispatcher, interface
 from smartapp.converter import CONVERTER
 from smartapp.interface import *
 from tests.testutil import load_file
@@ -31,6 +36,34 @@ TIMER_EVENT = {
     "expression": "string",
 }
 
+NON_DEVICE_EVENTS = tuple(event_type for event_type in EventType if event_type != EventType.DEVICE_EVENT)
+NON_TIMER_EVENTS = tuple(event_type for event_type in EventType if event_type != EventType.TIMER_EVENT)
+
+
+def load_request(path, cls):
+    """Load a request fixture and convert it to the given request class."""
+    return CONVERTER.from_json(load_file(os.path.join(FIXTURE_DIR, path)), cls)
+
+
+@pytest.fixture(scope="module")
+def install_request():
+    return load_request(os.path.join("live", "request", "INSTALL.1.json"), InstallRequest)
+
+
+@pytest.fixture(scope="module")
+def update_request():
+    return load_request(os.path.join("samples", "request", "UPDATE.json"), UpdateRequest)
+
+
+@pytest.fixture(scope="module")
+def device_event_request():
+    return load_request(os.path.join("samples", "request", "EVENT-DEVICE.json"), EventRequest)
+
+
+@pytest.fixture(scope="module")
+def timer_event_request():
+    return load_request(os.path.join("samples", "request", "EVENT-TIMER.json"), EventRequest)
+
 
 class TestExceptions:
     @pytest.mark.parametrize(
@@ -51,6 +84,67 @@ class TestExceptions:
         assert e.message == "message"
         assert e.correlation_id == "id"
         assert isinstance(e, SmartAppError)
+        assert str(e) == "message"
+        assert repr(e) == f"{exception.__name__}(message='message', correlation_id='id')"
+        assert e != exception("message", "id")  # like any exception, equality is identity
+        copy = pickle.loads(pickle.dumps(e))
+        assert isinstance(copy, exception)
+        assert copy.message == "message"
+        assert copy.correlation_id == "id"
+
+
+def attrs_classes(*modules):
+    """Get all of the attrs classes defined in the passed-in modules."""
+    return [
+        cls
+        for module in modules
+        for cls in vars(module).values()
+        if inspect.isclass(cls) and attrs.has(cls) and cls.__module__ == module.__name__
+    ]
+
+
+class TestSlots:
+    @pytest.mark.parametrize("cls", attrs_classes(interface, dispatcher))
+    def test_slots(self, cls):
+        assert cls.__dictoffset__ == 0  # i.e. instances have no __dict__
+
+    @pytest.mark.parametrize("cls", attrs_classes(interface))
+    def test_no_weakref(self, cls):
+        assert cls.__weakrefoffset__ == 0  # i.e. instances have no __weakref__
+
+
+class TestEnums:
+    @pytest.mark.parametrize(
+        "cls",
+        [LifecyclePhase, ConfigValueType, ConfigPhase, ConfigSettingType, EventType, SubscriptionType, BooleanValue],
+    )
+    def test_equal_to_value(self, cls):
+        for member in cls:
+            assert member == member.value
+            assert hash(member) == hash(member.value)
+            assert {member.value: "found"}[member] == "found"
+
+    def test_equal_across_enums(self):
+        # this is intentional; it's a consequence of comparing like the raw JSON values
+        assert ConfigValueType.DEVICE == ConfigSettingType.DEVICE == SubscriptionType.DEVICE
+        assert ConfigPhase.PAGE == ConfigSettingType.PAGE
+        assert ConfigPhase.PAGE is not ConfigSettingType.PAGE
+
+
+class TestLookupTables:
+    @pytest.mark.parametrize(
+        "table,key",
+        [
+            (EVENT_ATTRIBUTE_BY_TYPE, EventType.DEVICE_EVENT),
+            (REQUEST_BY_PHASE, LifecyclePhase.EVENT),
+            (CONFIG_VALUE_BY_TYPE, ConfigValueType.STRING),
+            (CONFIG_SETTING_BY_TYPE, ConfigSettingType.TEXT),
+        ],
+    )
+    def test_read_only(self, table, key):
+        assert key in table
+        with pytest.raises(TypeError):
+            table[key] = None
 
 
 class TestSmartAppRequestContext:
@@ -77,6 +171,17 @@ class TestSmartAppRequestContext:
         for header in ["missing", "empty", "whitespace", "none"]:
             assert context.header(header) is None
 
+    def test_context_blank(self):
+        context = SmartAppRequestContext(headers={"Date": " ", "Authorization": "", "X-ST-Correlation": None})
+        assert context.correlation_id is None
+        assert context.signature is None
+        assert context.date is None
+
+    def test_header_names(self):
+        # the context looks these up in the normalized headers without lowercasing them
+        for name in [AUTHORIZATION_HEADER, CORRELATION_ID_HEADER, DATE_HEADER]:
+            assert name == name.lower()
+
 
 class TestEvent:
     @pytest.mark.parametrize(
@@ -100,80 +205,169 @@ class TestEvent:
         args = {"event_type": event_type, attribute: value}
         assert (Event(**args).for_type(event_type)) is value
 
+    def test_for_type_all_types(self):
+        event = Event(event_type=EventType.DEVICE_EVENT)
+        for event_type in EventType:
+            assert event.for_type(event_type) is None
+
+
+class TestDeviceValue:
+    def test_hash(self):
+        first = DeviceValue(device_id="device", component_id="main")
+        second = DeviceValue(device_id="device", component_id="main")
+        assert hash(first) == hash(first) == hash(second)
+        assert {first, second, DeviceValue(device_id="other", component_id="main")} == {
+            first,
+            DeviceValue(device_id="other", component_id="main"),
+        }
+
+
+class TestInstalledApp:
+    def test_parsed_values(self):
+        config = {"minutes": [StringConfigValue(string_config=StringValue(value="5"))]}
+        app = InstalledApp(installed_app_id="id", location_id="location", config=config)
+        assert app.as_int("minutes") == 5
+        assert isinstance(app.as_float("minutes"), float) and app.as_float("minutes") == 5.0
+        config["minutes"][0] = StringConfigValue(string_config=StringValue(value="6"))  # all accessors see the change
+        assert app.as_str("minutes") == "6"
+        assert app.as_int("minutes") == 6
+        assert app.as_float("minutes") == 6.0
+
+    def test_permissions(self):
+        assert InstalledApp(installed_app_id="id", location_id="location", config={}).permissions == []
+        assert InstalledApp(installed_app_id="id", location_id="location", config={}, permissions=["r:devices:*"]).permissions == [
+            "r:devices:*"
+        ]
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [("true", True), ("True", True), ("TRUE", True), ("false", False), ("False", False), ("", False), ("5", False)],
+    )
+    def test_as_bool(self, value, expected):
+        config = {"enabled": [StringConfigValue(string_config=StringValue(value=value))]}
+        app = InstalledApp(installed_app_id="id", location_id="location", config=config)
+        assert app.as_bool("enabled") is expected
+
+
+class TestResponses:
+    @pytest.mark.parametrize(
+        "response,attribute,key",
+        [
+            (InstallResponse, "install_data", "installData"),
+            (UpdateResponse, "update_data", "updateData"),
+            (UninstallResponse, "uninstall_data", "uninstallData"),
+            (OauthCallbackResponse, "o_auth_callback_data", "oAuthCallbackData"),
+            (EventResponse, "event_data", "eventData"),
+        ],
+    )
+    def test_empty_data(self, response, attribute, key):
+        assert getattr(response(), attribute) is EMPTY_MAPPING
+        assert CONVERTER.unstructure(response()) == {key: {}}
+
+
+class TestConfirmationRequest:
+    def test_empty_settings(self):
+        args = {
+            "lifecycle": LifecyclePhase.CONFIRMATION,
+            "execution_id": "id",
+            "locale": "en",
+            "version": "1.0.0",
+            "app_id": "app",
+            "confirmation_data": ConfirmationData(app_id="app", confirmation_url="url"),
+        }
+        first = ConfirmationRequest(**args)
+        second = ConfirmationRequest(**args)
+        assert first.settings is EMPTY_MAPPING and second.settings is EMPTY_MAPPING
+        assert first.settings == {}
+        with pytest.raises(TypeError):
+            first.settings["key"] = "value"
+
 
 class TestInstallRequest:
-    def test_config_convenience_methods(self):
-        path = os.path.join("live", "request", "INSTALL.1.json")
-        data = load_file(os.path.join(FIXTURE_DIR, path))
-        request = CONVERTER.from_json(data, InstallRequest)
-        assert request.as_str("retrieve-weather-enabled") == "true"
-        assert request.as_bool("retrieve-weather-enabled") is True
-        assert request.as_str("retrieve-weather-frequency") == "15"
-        assert request.as_int("retrieve-weather-frequency") == 15
-        assert request.as_float("retrieve-weather-frequency") == 15.0
-        assert request.as_devices("humidity-devices") == [
+    def test_config_convenience_methods(self, install_request):
+        assert install_request.as_str("retrieve-weather-enabled") == "true"
+        assert install_request.as_bool("retrieve-weather-enabled") is True
+        assert install_request.as_str("retrieve-weather-frequency") == "15"
+        assert install_request.as_int("retrieve-weather-frequency") == 15
+        assert install_request.as_float("retrieve-weather-frequency") == 15.0
+        assert install_request.as_devices("humidity-devices") == [
             DeviceValue(device_id="3ac74985-XXXX-XXXX-XXXX-ea9623be6a7b", component_id="main"),
             DeviceValue(device_id="0ff440ec-XXXX-XXXX-XXXX-a39e189b8cc9", component_id="main"),
         ]
 
 
 class TestUpdateRequest:
-    def test_config_convenience_methods(self):
-        path = os.path.join("samples", "request", "UPDATE.json")
-        data = load_file(os.path.join(FIXTURE_DIR, path))
-        request = CONVERTER.from_json(data, UpdateRequest)
-        assert request.as_str("minutes") == "5"
-        assert request.as_bool("minutes") is True
-        assert request.as_int("minutes") == 5
-        assert request.as_float("minutes") == 5.0
-        assert request.as_devices("contactSensor") == [
+    def test_config_convenience_methods(self, update_request):
+        assert update_request.as_str("minutes") == "5"
+        assert update_request.as_bool("minutes") is False
+        assert update_request.as_int("minutes") == 5
+        assert update_request.as_float("minutes") == 5.0
+        assert update_request.as_devices("contactSensor") == [
             DeviceValue(device_id="e457978e-5e37-43e6-979d-18112e12c961", component_id="main"),
         ]
 
 
 class TestEventRequest:
-    def test_for_type_device(self):
-        path = os.path.join("samples", "request", "EVENT-DEVICE.json")
-        data = load_file(os.path.join(FIXTURE_DIR, path))
-        request = CONVERTER.from_json(data, EventRequest)
-        for event_type in [event_type for event_type in EventType if event_type != EventType.DEVICE_EVENT]:
-            assert request.event_data.for_type(event_type) == []
-        assert request.event_data.for_type(EventType.DEVICE_EVENT) == [DEVICE_EVENT]
-
-    def test_for_type_timer(self):
-        path = os.path.join("samples", "request", "EVENT-TIMER.json")
-        data = load_file(os.path.join(FIXTURE_DIR, path))
-        request = CONVERTER.from_json(data, EventRequest)
-        for event_type in [event_type for event_type in EventType if event_type != EventType.TIMER_EVENT]:
-            assert request.event_data.for_type(event_type) == []
-        assert request.event_data.for_type(EventType.TIMER_EVENT) == [TIMER_EVENT]
-
-    def test_filter_device(self):
-        path = os.path.join("samples", "request", "EVENT-DEVICE.json")
-        data = load_file(os.path.join(FIXTURE_DIR, path))
-        request = CONVERTER.from_json(data, EventRequest)
-        for event_type in [event_type for event_type in EventType if event_type != EventType.DEVICE_EVENT]:
-            assert request.event_data.filter(event_type) == []
-            assert request.event_data.filter(event_type, predicate=lambda x: False) == []
-            assert request.event_data.filter(event_type, predicate=lambda x: True) == []
-        assert request.event_data.filter(EventType.DEVICE_EVENT) == [DEVICE_EVENT]
-        assert request.event_data.filter(EventType.DEVICE_EVENT, predicate=lambda x: False) == []
-        assert request.event_data.filter(EventType.DEVICE_EVENT, predicate=lambda x: True) == [DEVICE_EVENT]
-        assert request.event_data.filter(
+    def test_for_type_device(self, device_event_request):
+        for event_type in NON_DEVICE_EVENTS:
+            assert device_event_request.event_data.for_type(event_type) == []
+        assert device_event_request.event_data.for_type(EventType.DEVICE_EVENT) == [DEVICE_EVENT]
+
+    def test_for_type_timer(self, timer_event_request):
+        for event_type in NON_TIMER_EVENTS:
+            assert timer_event_request.event_data.for_type(event_type) == []
+        assert timer_event_request.event_data.for_type(EventType.TIMER_EVENT) == [TIMER_EVENT]
+
+    def test_filter_device(self, device_event_request):
+        for event_type in NON_DEVICE_EVENTS:
+            assert device_event_request.event_data.filter(event_type) == []
+            assert device_event_request.event_data.filter(event_type, predicate=lambda x: False) == []
+            assert device_event_request.event_data.filter(event_type, predicate=lambda x: True) == []
+        assert device_event_request.event_data.filter(EventType.DEVICE_EVENT) == [DEVICE_EVENT]
+        assert device_event_request.event_data.filter(EventType.DEVICE_EVENT, predicate=lambda x: False) == []
+        assert device_event_request.event_data.filter(EventType.DEVICE_EVENT, predicate=lambda x: True) == [DEVICE_EVENT]
+        assert device_event_request.event_data.filter(
             EventType.DEVICE_EVENT, predicate=lambda x: x["deviceId"] == "6f5ea629-4c05-4a90-a244-cc129b0a80c3"
         ) == [DEVICE_EVENT]
 
-    def test_filter_timer(self):
-        path = os.path.join("samples", "request", "EVENT-TIMER.json")
-        data = load_file(os.path.join(FIXTURE_DIR, path))
-        request = CONVERTER.from_json(data, EventRequest)
-        for event_type in [event_type for event_type in EventType if event_type != EventType.TIMER_EVENT]:
-            assert request.event_data.filter(event_type) == []
-            assert request.event_data.filter(event_type, predicate=lambda x: False) == []
-            assert request.event_data.filter(event_type, predicate=lambda x: True) == []
-        assert request.event_data.filter(EventType.TIMER_EVENT) == [TIMER_EVENT]
-        assert request.event_data.filter(EventType.TIMER_EVENT, predicate=lambda x: False) == []
-        assert request.event_data.filter(EventType.TIMER_EVENT, predicate=lambda x: True) == [TIMER_EVENT]
-        assert request.event_data.filter(EventType.TIMER_EVENT, predicate=lambda x: x["name"] == "lights_off_timeout") == [
-            TIMER_EVENT
+    def test_filter_timer(self, timer_event_request):
+        for event_type in NON_TIMER_EVENTS:
+            assert timer_event_request.event_data.filter(event_type) == []
+            assert timer_event_request.event_data.filter(event_type, predicate=lambda x: False) == []
+            assert timer_event_request.event_data.filter(event_type, predicate=lambda x: True) == []
+        assert timer_event_request.event_data.filter(EventType.TIMER_EVENT) == [TIMER_EVENT]
+        assert timer_event_request.event_data.filter(EventType.TIMER_EVENT, predicate=lambda x: False) == []
+        assert timer_event_request.event_data.filter(EventType.TIMER_EVENT, predicate=lambda x: True) == [TIMER_EVENT]
+        assert timer_event_request.event_data.filter(
+            EventType.TIMER_EVENT, predicate=lambda x: x["name"] == "lights_off_timeout"
+        ) == [TIMER_EVENT]
+
+    def test_for_type_mixed(self):
+        device = {"device": "event"}
+        timer = {"timer": "event"}
+        events = [
+            Event(event_type=EventType.DEVICE_EVENT, device_event=device),
+            Event(event_type=EventType.TIMER_EVENT, timer_event=timer),
+            Event(event_type=EventType.DEVICE_EVENT, device_event=device),
+            Event(event_type=EventType.MODE_EVENT),  # no payload, so it is ignored
         ]
+        installed_app = InstalledApp(installed_app_id="id", location_id="location", config={})
+        event_data = EventData(auth_token="token", installed_app=installed_app, events=events)
+        assert event_data.events == tuple(events)
+        for _ in range(2):  # the second time around, the grouped events are reused
+            assert event_data.for_type(EventType.DEVICE_EVENT) == [device, device]
+            assert event_data.for_type(EventType.TIMER_EVENT) == [timer]
+            assert not event_data.for_type(EventType.MODE_EVENT)
+            assert not event_data.filter(EventType.DEVICE_EVENT, predicate=lambda x: False)
+        event_data.for_type(EventType.DEVICE_EVENT).clear()  # callers get a copy, so this has no effect
+        assert event_data.for_type(EventType.DEVICE_EVENT) == [device, device]
+
+    def test_for_type_no_payloads(self):
+        events = [Event(event_type=EventType.MODE_EVENT), Event(event_type=EventType.TIMER_EVENT)]
+        installed_app = InstalledApp(installed_app_id="id", location_id="location", config={})
+        event_data = EventData(auth_token="token", installed_app=installed_app, events=events)
+        with patch.object(Event, "for_type", autospec=True, side_effect=Event.for_type) as for_type:
+            for _ in range(2):  # even with nothing to group, the events are only scanned once
+                assert not event_data.for_type(EventType.MODE_EVENT)
+                assert not event_data.filter(EventType.TIMER_EVENT)
+            assert for_type.call_count == len(events)
@@ -13,7 +13,7 @@ from responses.registries import OrderedRegistry
 from tenacity import RetryError
 
 from smartapp.interface import SignatureError, SmartAppDefinition, SmartAppDispatcherConfig, SmartAppRequestContext
-from smartapp.signature import SignatureVerifier, retrieve_public_key
+from smartapp.signature import SignatureVerifier, retrieve_public_key, target_path
 
 # These tests are built on sample data found in the Joyent specification.
 # See: https://github.com/TritonDataCenter/node-http-signature/blob/master/http_signing.md#appendix-a---test-values
@@ -512,6 +512,21 @@ class TestSignatureVerifier:
         assert e.value.correlation_id == context.correlation_id
 
 
+class TestTargetPath:
+    @pytest.mark.parametrize(
+        "target_url,expected",
+        [
+            ("https://example.com", ""),
+            ("https://example.com/", "/"),
+            ("https://example.com/smartapp", "/smartapp"),
+            ("https://example.com/foo?param=value&pet=dog", "/foo?param=value&pet=dog"),
+        ],
+    )
+    def test_target_path(self, target_url, expected):
+        assert target_path(target_url) == expected
+        assert target_path(target_url) == expected  # second call is served from the cache
+
+
 class TestRetrievePublicKey:
     # This checks both the retry logic and the LRU cache.
     # Note that the LRU cache does not cache exceptions, only returned values.
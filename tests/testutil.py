@@ -16,9 +16,5 @@ def load_file(path: str) -> str:
 
 def load_dir(path: str) -> Dict[str, str]:
     """Load text of all files in a directory into a dict."""
-    data = {}
-    for f in os.listdir(path):
-        p = os.path.join(path, f)
-        if os.path.isfile(p):
-            data[f] = load_file(p)
-    return data
+    with os.scandir(path) as entries:
+        return {entry.name: load_file(entry.path) for entry in entries if entry.is_file()}